@@ -6,25 +6,74 @@ import subprocess
 import sys
 import re
 
+# コミットのプレフィックス → カテゴリ
+_CAT_RE = re.compile(
+    r'^(?:(?P<feat>feat|feature|機能)|(?P<fix>fix|修正)|(?P<docs>docs|ドキュメント)):\s*'
+)
+_CAT_NAMES = {
+    'feat': '新機能',
+    'fix': 'バグ修正',
+    'docs': 'ドキュメント',
+}
+
+# インストール方法 (タグごとに変わるのはバージョンのみ)
+_INSTALL_TMPL = """\
+## インストール方法
+
+### ファームウェアファイル
+
+- `kid_gps_tracker_{version}_nrf9151dk.zip` - FOTA用DFUパッケージ
+- `kid_gps_tracker_{version}_nrf9151dk.hex` - フラッシュ書き込み用
+- `manifest_nrf9151dk.json` - ファームウェアメタデータ
+
+### nRF Cloud 経由での更新
+
+1. nRF Cloud ポータルにログイン
+2. Firmware Update → Firmware Bundles へ移動
+3. `kid_gps_tracker_{version}_nrf9151dk.zip` をアップロード
+4. デバイスグループに対してFOTAジョブを作成
+5. ジョブを実行してデバイスを更新
+
+### ローカルでのフラッシュ書き込み
+
+`nrfjprog` を使用して `kid_gps_tracker_{version}_nrf9151dk.hex` を書き込むこともできます。
+"""
+
+def _read_subjects(proc: subprocess.Popen) -> list:
+    """git log の出力を件名のリストとして読む"""
+    # git の出力は UTF-8 なので、ロケールに依存せずバイト列のまま読んで
+    # 件名だけをデコードする
+    return [line.rstrip(b'\n').decode('utf-8', errors='replace')
+            for line in proc.stdout]
+
 def get_commits_since_last_tag(current_tag: str) -> list:
     """前回のタグからのコミットを取得"""
-    result = subprocess.run(
+    # 前回のタグの検索と、タグが無かった場合の全履歴の git log を同時に起動し、
+    # プロセス起動の待ち時間を重ねる
+    describe = subprocess.Popen(
         ['git', 'describe', '--abbrev=0', '--tags', f'{current_tag}^'],
-        capture_output=True, text=True
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
     )
+    fallback = subprocess.Popen(
+        ['git', 'log', current_tag, '--pretty=format:%s'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    with describe, fallback:
+        out, _ = describe.communicate()
+        if describe.returncode != 0:
+            return _read_subjects(fallback)
+        fallback.kill()
 
-    prev_tag = result.stdout.strip() if result.returncode == 0 else None
-
-    if prev_tag:
-        cmd = ['git', 'log', f'{prev_tag}..{current_tag}', '--pretty=format:%s']
-    else:
-        cmd = ['git', 'log', current_tag, '--pretty=format:%s']
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return result.stdout.strip().split('\n') if result.stdout else []
+    prev_tag = out.strip().decode('utf-8')
+    cmd = ['git', 'log', f'{prev_tag}..{current_tag}', '--pretty=format:%s']
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL) as proc:
+        return _read_subjects(proc)
 
 def categorize_commits(commits: list) -> dict:
-    """コミットをカテゴリ分け"""
+    """コミットをカテゴリ分けし、プレフィックスを除いた件名を返す"""
     categories = {
         '新機能': [],
         'バグ修正': [],
@@ -33,12 +82,9 @@ def categorize_commits(commits: list) -> dict:
     }
 
     for commit in commits:
-        if commit.startswith(('feat:', 'feature:', '機能:')):
-            categories['新機能'].append(commit)
-        elif commit.startswith(('fix:', '修正:')):
-            categories['バグ修正'].append(commit)
-        elif commit.startswith(('docs:', 'ドキュメント:')):
-            categories['ドキュメント'].append(commit)
+        m = _CAT_RE.match(commit)
+        if m:
+            categories[_CAT_NAMES[m.lastgroup]].append(commit[m.end():])
         else:
             categories['その他'].append(commit)
 
@@ -49,31 +95,17 @@ def generate_release_notes(tag: str) -> str:
     commits = get_commits_since_last_tag(tag)
     categories = categorize_commits(commits)
 
-    notes = f"# リリース {tag}\n\n"
+    parts = [f"# リリース {tag}\n\n"]
 
     for category, items in categories.items():
         if items:
-            notes += f"## {category}\n\n"
-            for item in items:
-                cleaned = re.sub(r'^(feat|fix|docs|機能|修正):\s*', '', item)
-                notes += f"- {cleaned}\n"
-            notes += "\n"
-
-    notes += "## インストール方法\n\n"
-    notes += "### ファームウェアファイル\n\n"
-    notes += f"- `kid_gps_tracker_{tag.lstrip('v')}_nrf9151dk.zip` - FOTA用DFUパッケージ\n"
-    notes += f"- `kid_gps_tracker_{tag.lstrip('v')}_nrf9151dk.hex` - フラッシュ書き込み用\n"
-    notes += f"- `manifest_nrf9151dk.json` - ファームウェアメタデータ\n\n"
-    notes += "### nRF Cloud 経由での更新\n\n"
-    notes += "1. nRF Cloud ポータルにログイン\n"
-    notes += "2. Firmware Update → Firmware Bundles へ移動\n"
-    notes += f"3. `kid_gps_tracker_{tag.lstrip('v')}_nrf9151dk.zip` をアップロード\n"
-    notes += "4. デバイスグループに対してFOTAジョブを作成\n"
-    notes += "5. ジョブを実行してデバイスを更新\n\n"
-    notes += "### ローカルでのフラッシュ書き込み\n\n"
-    notes += f"`nrfjprog` を使用して `kid_gps_tracker_{tag.lstrip('v')}_nrf9151dk.hex` を書き込むこともできます。\n"
-
-    return notes
+            parts.append(f"## {category}\n\n")
+            parts.extend(f"- {item}\n" for item in items)
+            parts.append("\n")
+
+    parts.append(_INSTALL_TMPL.format(version=tag.lstrip('v')))
+
+    return "".join(parts)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -3,31 +3,40 @@
 Git tag から Kconfig にバージョンを注入
 例: v1.2.3 → CONFIG_APP_VERSION="1.2.3"
 """
+import os
 import re
+import shutil
 import sys
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 
+_VERSION_RE = re.compile(r'v?(\d+\.\d+\.\d+)')
+_DEFAULT_RE = re.compile(r'default\s+"[0-9]+\.[0-9]+\.[0-9]+"')
+
+@lru_cache(maxsize=32)
 def extract_version_from_tag(tag: str) -> str:
     """v1.2.3 から 1.2.3 を抽出"""
-    match = re.match(r'v?(\d+\.\d+\.\d+)', tag)
+    match = _VERSION_RE.match(tag)
     if not match:
         raise ValueError(f"Invalid tag format: {tag}")
     return match.group(1)
 
 def inject_version_to_kconfig(version: str, kconfig_path: Path):
     """Kconfig の CONFIG_APP_VERSION を更新"""
-    with open(kconfig_path, 'r') as f:
-        content = f.read()
-
-    # default "1.0.0" の行を置換
-    updated = re.sub(
-        r'default\s+"[0-9]+\.[0-9]+\.[0-9]+"',
-        f'default "{version}"',
-        content
-    )
-
-    with open(kconfig_path, 'w') as f:
-        f.write(updated)
+    replacement = f'default "{version}"'
+
+    # 1行ずつ一時ファイルに書き出し、最後にアトミックに置き換える
+    with open(kconfig_path, 'r') as src, tempfile.NamedTemporaryFile(
+            'w', dir=kconfig_path.parent, delete=False) as tmp:
+        for line in src:
+            # default "1.0.0" の行を置換
+            if 'default' in line:
+                line = _DEFAULT_RE.sub(lambda _: replacement, line)
+            tmp.write(line)
+
+    shutil.copymode(kconfig_path, tmp.name)
+    os.replace(tmp.name, kconfig_path)
 
     print(f"✓ Injected version {version} into Kconfig")
 
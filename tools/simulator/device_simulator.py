@@ -30,6 +30,8 @@ Keyboard commands during simulation:
 """
 
 import json
+import logging
+import socket
 import ssl
 import time
 import sys
@@ -39,11 +41,27 @@ import random
 import math
 import tempfile
 import hashlib
-from datetime import datetime, timezone
-from urllib import request as urllib_request
-from urllib.error import HTTPError, URLError
+from datetime import datetime, timedelta, timezone
 
 import paho.mqtt.client as mqtt
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to stdlib json
+    orjson = None
+
+# Per-publish confirmations go through this logger so they can be muted
+# with SIM_LOG=WARNING on long-running simulators
+logger = logging.getLogger("sim")
+
+# Simulator directory, holding config.json and the certs/ cache
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+_CERTS_DIR = os.path.join(_MODULE_DIR, "certs")
 
 # ============================================================
 # Tokyo walking route: circular route around central Tokyo
@@ -73,57 +91,91 @@ TOKYO_ROUTE = [
 
 
 def interpolate_points(p1, p2, num_steps):
-    """Generate intermediate points between two waypoints."""
-    points = []
-    for i in range(1, num_steps + 1):
-        ratio = i / num_steps
-        lat = p1["lat"] + (p2["lat"] - p1["lat"]) * ratio
-        lng = p1["lng"] + (p2["lng"] - p1["lng"]) * ratio
-        points.append({"lat": lat, "lng": lng})
-    return points
+    """Generate intermediate (lat, lng) points between two waypoints."""
+    lat0, lng0 = p1["lat"], p1["lng"]
+    dlat = (p2["lat"] - lat0) / num_steps
+    dlng = (p2["lng"] - lng0) / num_steps
+    return [(lat0 + dlat * i, lng0 + dlng * i) for i in range(1, num_steps + 1)]
 
 
 def build_route(waypoints, steps_between=3):
-    """Build a detailed route with interpolated points between waypoints."""
+    """Build a detailed route with interpolated points between waypoints.
+
+    Returns a tuple of (lat, lng, name) tuples; name is None for
+    interpolated points.
+    """
     route = []
     for i in range(len(waypoints) - 1):
-        route.append(waypoints[i])
-        route.extend(interpolate_points(waypoints[i], waypoints[i + 1], steps_between))
-    route.append(waypoints[-1])
-    return route
+        wp = waypoints[i]
+        route.append((wp["lat"], wp["lng"], wp["name"]))
+        route.extend((lat, lng, None) for lat, lng in
+                     interpolate_points(wp, waypoints[i + 1], steps_between))
+    wp = waypoints[-1]
+    route.append((wp["lat"], wp["lng"], wp["name"]))
+    return tuple(route)
+
+
+# Route is static, so build it once at import and keep it as parallel
+# tuples; interpolated points get their display name precomputed
+ROUTE_LATS, ROUTE_LNGS, _route_names = zip(*build_route(TOKYO_ROUTE))
+ROUTE_NAMES = tuple(name or f"Point {i}" for i, name in enumerate(_route_names))
+del _route_names
+
+
+if orjson is not None:
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj):
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    json_loads = json.loads
 
 
 def now_ms():
     """Current time in milliseconds since epoch."""
-    return int(datetime.now(timezone.utc).timestamp() * 1000)
+    return time.time_ns() // 1_000_000
 
 
 # ============================================================
 # nRF Cloud REST API Client
 # ============================================================
 class NrfCloudApi:
-    """Minimal nRF Cloud REST API client using only stdlib."""
+    """Minimal nRF Cloud REST API client.
+
+    All calls share one requests.Session so the TCP/TLS connection to the
+    API host is reused instead of re-established per request.
+    """
 
     def __init__(self, api_key, api_host="https://api.nrfcloud.com"):
         self.api_key = api_key
         self.api_host = api_host
-
-    def _request(self, method, path, body=None):
-        url = f"{self.api_host}{path}"
-        data = json.dumps(body).encode("utf-8") if body else None
-        req = urllib_request.Request(url, data=data, method=method)
-        req.add_header("Authorization", f"Bearer {self.api_key}")
-        req.add_header("Content-Type", "application/json")
+        self._account = None
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def _send(self, method, path, **kwargs):
+        resp = self._session.request(method, f"{self.api_host}{path}", **kwargs)
         try:
-            with urllib_request.urlopen(req) as resp:
-                return json.loads(resp.read().decode("utf-8"))
-        except HTTPError as e:
-            error_body = e.read().decode("utf-8") if e.fp else ""
-            print(f"[API] {method} {path} -> HTTP {e.code}: {error_body[:300]}")
+            resp.raise_for_status()
+        except requests.HTTPError:
+            print(f"[API] {method} {path} -> HTTP {resp.status_code}: {resp.text[:300]}")
             raise
+        return resp
+
+    def _request(self, method, path, body=None):
+        data = json_dumps(body) if body else None
+        return json_loads(self._send(method, path, data=data).content)
 
     def get_account(self):
-        return self._request("GET", "/v1/account")
+        # Account info does not change during a run; fetch it only once
+        if self._account is None:
+            self._account = self._request("GET", "/v1/account")
+        return self._account
 
     def get_device(self, device_id):
         return self._request("GET", f"/v1/devices/{device_id}")
@@ -140,82 +192,121 @@ class NrfCloudApi:
         # CSV format: deviceId,[subType],[tags],[fwTypes],"certPem"
         # subType, tags, fwTypes are optional but commas are needed
         csv_line = f'{device_id},,simulator,,"{cert_pem.strip()}\n"'
-        data = csv_line.encode("utf-8")
-
-        url = f"{self.api_host}/v1/devices"
-        req = urllib_request.Request(url, data=data, method="POST")
-        req.add_header("Authorization", f"Bearer {self.api_key}")
-        req.add_header("Content-Type", "application/octet-stream")
-        try:
-            with urllib_request.urlopen(req) as resp:
-                body = resp.read().decode("utf-8")
-                return json.loads(body) if body.strip() else {}
-        except HTTPError as e:
-            error_body = e.read().decode("utf-8") if e.fp else ""
-            print(f"[API] POST /v1/devices -> HTTP {e.code}: {error_body[:300]}")
-            raise
+        resp = self._send(
+            "POST", "/v1/devices",
+            data=csv_line.encode("utf-8"),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        return json_loads(resp.content) if resp.content.strip() else {}
 
 
 # ============================================================
 # Device Certificate Management
 # ============================================================
+# Amazon Root CA 1 (https://www.amazontrust.com/repository/AmazonRootCA1.pem),
+# the trust anchor for the nRF Cloud MQTT broker.
+AMAZON_ROOT_CA1_PEM = (
+    b"-----BEGIN CERTIFICATE-----\n"
+    b"MIIDQTCCAimgAwIBAgITBmyfz5m/jAo54vB4ikPmljZbyjANBgkqhkiG9w0BAQsF\n"
+    b"ADA5MQswCQYDVQQGEwJVUzEPMA0GA1UEChMGQW1hem9uMRkwFwYDVQQDExBBbWF6\n"
+    b"b24gUm9vdCBDQSAxMB4XDTE1MDUyNjAwMDAwMFoXDTM4MDExNzAwMDAwMFowOTEL\n"
+    b"MAkGA1UEBhMCVVMxDzANBgNVBAoTBkFtYXpvbjEZMBcGA1UEAxMQQW1hem9uIFJv\n"
+    b"b3QgQ0EgMTCCASIwDQYJKoZIhvcNAQEBBQADggEPADCCAQoCggEBALJ4gHHKeNXj\n"
+    b"ca9HgFB0fW7Y14h29Jlo91ghYPl0hAEvrAIthtOgQ3pOsqTQNroBvo3bSMgHFzZM\n"
+    b"9O6II8c+6zf1tRn4SWiw3te5djgdYZ6k/oI2peVKVuRF4fn9tBb6dNqcmzU5L/qw\n"
+    b"IFAGbHrQgLKm+a/sRxmPUDgH3KKHOVj4utWp+UhnMJbulHheb4mjUcAwhmahRWa6\n"
+    b"VOujw5H5SNz/0egwLX0tdHA114gk957EWW67c4cX8jJGKLhD+rcdqsq08p8kDi1L\n"
+    b"93FcXmn/6pUCyziKrlA4b9v7LWIbxcceVOF34GfID5yHI9Y/QCB/IIDEgEw+OyQm\n"
+    b"jgSubJrIqg0CAwEAAaNCMEAwDwYDVR0TAQH/BAUwAwEB/zAOBgNVHQ8BAf8EBAMC\n"
+    b"AYYwHQYDVR0OBBYEFIQYzIU07LwMlJQuCFmcx7IQTgoIMA0GCSqGSIb3DQEBCwUA\n"
+    b"A4IBAQCY8jdaQZChGsV2USggNiMOruYou6r4lK5IpDB/G/wkjUu0yKGX9rbxenDI\n"
+    b"U5PMCCjjmCXPI6T53iHTfIUJrU6adTrCC2qJeHZERxhlbI1Bjjt/msv0tadQ1wUs\n"
+    b"N+gDS63pYaACbvXy8MWy7Vu33PqUXHeeE6V/Uq2V8viTO96LXFvKWlJbYK8U90vv\n"
+    b"o/ufQJVtMVT8QtPHRh8jrdkPSHCa2XV4cdFyQzR1bldZwgJcJmApzyMZFo6IQ6XU\n"
+    b"5MsI+yMRQ+hDKXJioaldXgjUkK642M4UwtBV8ob2xJNDd2ZhwLnoQdeXeGADbkpy\n"
+    b"rqXRfboQnoZsG4q5WTP468SQvvG5\n"
+    b"-----END CERTIFICATE-----\n"
+)
+
+
 class DeviceCerts:
     """Generate and manage device certificates for MQTT connection."""
 
+    __slots__ = ("device_id", "certs_dir", "key_path", "cert_path", "ca_path",
+                 "_exists")
+
     def __init__(self, device_id, certs_dir):
         self.device_id = device_id
         self.certs_dir = certs_dir
         self.key_path = os.path.join(certs_dir, f"{device_id}.key.pem")
         self.cert_path = os.path.join(certs_dir, f"{device_id}.cert.pem")
         self.ca_path = os.path.join(certs_dir, "AmazonRootCA1.pem")
+        self._exists = None
 
     @property
     def exists(self):
-        return (os.path.exists(self.key_path) and
-                os.path.exists(self.cert_path) and
-                os.path.exists(self.ca_path))
+        """Whether key, cert and CA are all present.
 
-    def download_ca(self):
-        """Download Amazon Root CA 1."""
+        Checked once and cached; methods that write cert files reset it.
+        """
+        if self._exists is None:
+            self._exists = self._scan()
+        return self._exists
+
+    def _scan(self):
+        # One directory listing instead of a stat per file
+        try:
+            with os.scandir(self.certs_dir) as it:
+                names = {entry.name for entry in it}
+        except FileNotFoundError:
+            return False
+        return {os.path.basename(path) for path in
+                (self.key_path, self.cert_path, self.ca_path)} <= names
+
+    def install_ca(self):
+        """Write the bundled Amazon Root CA 1 into the certs directory."""
         if os.path.exists(self.ca_path):
             return
-        print("[Certs] Downloading Amazon Root CA 1...")
-        url = "https://www.amazontrust.com/repository/AmazonRootCA1.pem"
-        req = urllib_request.Request(url)
-        with urllib_request.urlopen(req) as resp:
-            ca_pem = resp.read()
         with open(self.ca_path, "wb") as f:
-            f.write(ca_pem)
+            f.write(AMAZON_ROOT_CA1_PEM)
+        self._exists = None
         print(f"[Certs] Saved: {self.ca_path}")
 
     def generate_key_and_self_signed_cert(self):
-        """Generate EC private key and self-signed certificate using openssl CLI.
+        """Generate EC private key and self-signed certificate.
 
         nRF Cloud accepts self-signed certificates for device onboarding.
         """
         print("[Certs] Generating device key pair and self-signed certificate...")
 
-        # Generate EC private key
-        ret = os.system(
-            f'openssl ecparam -genkey -name prime256v1 -noout '
-            f'-out "{self.key_path}" 2>nul'
-        )
-        if ret != 0:
-            raise RuntimeError(
-                "Failed to generate key. Ensure OpenSSL is installed and in PATH."
-            )
+        # Generate EC private key (P-256)
+        key = ec.generate_private_key(ec.SECP256R1())
 
         # Generate self-signed certificate (valid for 10 years)
-        ret = os.system(
-            f'openssl req -new -x509 -key "{self.key_path}" '
-            f'-out "{self.cert_path}" -days 3650 '
-            f'-subj "/CN={self.device_id}" 2>nul'
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, self.device_id)])
+        now = datetime.now(timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + timedelta(days=3650))
+            .sign(key, hashes.SHA256())
         )
-        if ret != 0:
-            raise RuntimeError("Failed to generate self-signed certificate")
 
-        with open(self.cert_path, "r") as f:
-            cert_pem = f.read()
+        with open(self.key_path, "wb") as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            ))
+
+        cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode("ascii")
+        with open(self.cert_path, "w") as f:
+            f.write(cert_pem)
+        self._exists = None
 
         print(f"[Certs] Key:  {self.key_path}")
         print(f"[Certs] Cert: {self.cert_path}")
@@ -225,19 +316,62 @@ class DeviceCerts:
 # ============================================================
 # Device Simulator
 # ============================================================
+# Canned replies for AT commands from the nRF Cloud Terminal
+# (AT+CGSN answers with the device ID, see _send_at_response)
+_AT_RESPONSES = {
+    "AT+CGMR": "mfw_nrf91x1_2.0.2",
+    "AT%HWVERSION": "nRF9151 LACA AAA (simulator)",
+    "AT+CIMI": "440100000000000",
+}
+
+
 class DeviceSimulator:
     def __init__(self, config_path="config.json"):
         self.config = self._load_config(config_path)
         self.client = None
         self.connected = False
-        self.route = build_route(TOKYO_ROUTE)
+        self._connected_event = threading.Event()
         self.route_index = 0
+        sim = self.config["simulation"]
         self.shadow_config = {
             "counterEnable": False,
-            "locationInterval": self.config["simulation"]["location_interval_seconds"],
+            "locationInterval": sim["location_interval_seconds"],
+        }
+        self._temp_interval = sim.get("temperature_interval_seconds", 300)
+        self._temp_base = sim["temperature_base"]
+        # Daily temperature swing by local hour (peak at 12:00)
+        variation = sim["temperature_variation"]
+        self._daily_offsets = tuple(
+            variation * math.sin((hour - 6) * math.pi / 12) for hour in range(24)
+        )
+        self._app_version = sim.get("app_version", "0.0.1")
+
+        # DEVICE message sent on every connect; only "ts" changes, and
+        # "config" references shadow_config so updates are picked up
+        self._device_info_msg = {
+            "appId": "DEVICE",
+            "messageType": "DATA",
+            "ts": 0,
+            "data": {
+                "networkInfo": {
+                    "networkCode": "10",
+                    "areaCode": "1234",
+                    "mccmnc": "44010",
+                    "ipAddress": "10.0.0.1",
+                    "cellID": "ABCD1234",
+                    "rsrp": -85,
+                },
+                "simInfo": {
+                    "iccid": "8981100000000000000",
+                    "imsi": "440100000000000",
+                },
+                "appVersion": self._app_version,
+                "config": self.shadow_config,
+            },
         }
         self.test_counter = 0
         self.running = False
+        self._stop_event = threading.Event()
         self._diag_mode = False
         self.mqtt_host = None
         self.topic_prefix = None
@@ -250,16 +384,16 @@ class DeviceSimulator:
 
         # Device ID
         self.device_id = self.config["nrf_cloud"]["device_id"]
+        self._c2d_needle = f"/m/d/{self.device_id}/"
 
         # Certs directory
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.certs_dir = os.path.join(base_dir, "certs")
+        self.certs_dir = _CERTS_DIR
         os.makedirs(self.certs_dir, exist_ok=True)
 
         self.certs = DeviceCerts(self.device_id, self.certs_dir)
 
     def _load_config(self, path):
-        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        config_path = os.path.join(_MODULE_DIR, path)
         if not os.path.exists(config_path):
             print(f"ERROR: Config file not found: {config_path}")
             print("Copy config_template.json to config.json and fill in your settings.")
@@ -274,8 +408,8 @@ class DeviceSimulator:
         """Provision a new virtual device on nRF Cloud."""
         print(f"\n[Provision] Setting up device: {self.device_id}")
 
-        # Download CA cert
-        self.certs.download_ca()
+        # Install CA cert
+        self.certs.install_ca()
 
         # Check if device already exists and has certs
         if self.certs.exists:
@@ -286,13 +420,13 @@ class DeviceSimulator:
         print("[Provision] Fetching account info...")
         account = self.api.get_account()
         self.mqtt_host = account.get("mqttEndpoint", "mqtt.nrfcloud.com")
-        # Try multiple possible field names for team/tenant ID
-        team_id = (account.get("teamId", "") or
-                   account.get("tenantId", "") or
-                   account.get("team", {}).get("tenantId", "") or
-                   account.get("mqttTopicPrefix", "").split("/")[0] if
-                   account.get("mqttTopicPrefix") else "")
-        mqtt_prefix = account.get("mqttTopicPrefix", "")
+        mqtt_prefix = account.get("mqttTopicPrefix") or ""
+        # Try multiple possible field names for team/tenant ID; `or`
+        # short-circuits, so the prefix is only split as a last resort
+        team_id = (account.get("teamId") or
+                   account.get("tenantId") or
+                   account.get("team", {}).get("tenantId") or
+                   mqtt_prefix.split("/", 1)[0])
         print(f"[Provision] MQTT endpoint: {self.mqtt_host}")
         print(f"[Provision] Team ID: {team_id}")
         print(f"[Provision] MQTT prefix: {mqtt_prefix}")
@@ -305,13 +439,13 @@ class DeviceSimulator:
         try:
             self.api.onboard_device(self.device_id, cert_pem)
             print("[Provision] Device onboarded successfully!")
-        except HTTPError as e:
-            if e.code == 409:
+        except requests.HTTPError as e:
+            if e.response.status_code == 409:
                 print("[Provision] Device already exists on nRF Cloud.")
                 print("[Provision] If you need to re-provision, delete the device")
                 print("            from the nRF Cloud portal, then run again.")
                 return False
-            print(f"[Provision] Onboarding failed (HTTP {e.code}).")
+            print(f"[Provision] Onboarding failed (HTTP {e.response.status_code}).")
             return False
 
         # Don't cache topics here; _load_mqtt_info will fetch the
@@ -320,15 +454,13 @@ class DeviceSimulator:
 
     def _save_mqtt_info(self, info):
         """Save MQTT connection info to a local cache file."""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        info_path = os.path.join(base_dir, "certs", f"{self.device_id}.mqtt_info.json")
+        info_path = os.path.join(_CERTS_DIR, f"{self.device_id}.mqtt_info.json")
         with open(info_path, "w") as f:
             json.dump(info, f, indent=2)
 
     def _load_mqtt_info(self):
         """Load cached MQTT connection info, or fetch from nRF Cloud APIs."""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        info_path = os.path.join(base_dir, "certs", f"{self.device_id}.mqtt_info.json")
+        info_path = os.path.join(_CERTS_DIR, f"{self.device_id}.mqtt_info.json")
         if os.path.exists(info_path):
             with open(info_path, "r") as f:
                 info = json.load(f)
@@ -378,14 +510,21 @@ class DeviceSimulator:
             self.connected = True
             print(f"[MQTT] Connected to {self.mqtt_host}")
 
+            # Small d2c payloads should not wait for Nagle coalescing
+            sock = client.socket()
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
             if self._diag_mode:
                 print("[DIAG] Connected OK. Holding connection (no subscribe)...")
                 print("[DIAG] Waiting 10 seconds to see if connection stays...")
+                self._connected_event.set()
                 return
 
             # Subscribe to c2d topic
             client.subscribe(self.topic_c2d)
             print(f"[MQTT] Subscribed to: {self.topic_c2d}")
+            self._connected_event.set()
         else:
             rc_messages = {
                 1: "incorrect protocol version",
@@ -400,6 +539,7 @@ class DeviceSimulator:
 
     def _on_disconnect(self, client, userdata, rc):
         self.connected = False
+        self._connected_event.clear()
         if rc != 0:
             print(f"[MQTT] Unexpected disconnect (rc={rc}), will attempt reconnect...")
         else:
@@ -411,12 +551,13 @@ class DeviceSimulator:
         c2d pattern is like: .../m/d/{deviceId}/+/r
         Actual topics will be: .../m/d/{deviceId}/{something}/r
         """
-        return topic.endswith("/r") and f"/m/d/{self.device_id}/" in topic
+        return topic.endswith("/r") and self._c2d_needle in topic
 
     def _on_message(self, client, userdata, msg):
         topic = msg.topic
         try:
-            payload = json.loads(msg.payload.decode("utf-8"))
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            payload = json_loads(msg.payload)
         except (json.JSONDecodeError, UnicodeDecodeError):
             print(f"[MQTT] Received non-JSON on {topic}: {msg.payload[:100]}")
             return
@@ -458,13 +599,11 @@ class DeviceSimulator:
             print(f"[Config] Updated: {json.dumps(self.shadow_config)}")
 
     def _send_at_response(self, command):
-        responses = {
-            "AT+CGMR": "mfw_nrf91x1_2.0.2",
-            "AT+CGSN": self.device_id,
-            "AT%HWVERSION": "nRF9151 LACA AAA (simulator)",
-            "AT+CIMI": "440100000000000",
-        }
-        response = responses.get(command.strip(), "ERROR")
+        cmd = command.strip()
+        if cmd == "AT+CGSN":
+            response = self.device_id
+        else:
+            response = _AT_RESPONSES.get(cmd, "ERROR")
         msg = {
             "appId": "MODEM",
             "messageType": "DATA",
@@ -480,20 +619,20 @@ class DeviceSimulator:
         if not self.connected:
             print("[MQTT] Not connected, dropping message")
             return False
-        payload = json.dumps(message)
+        payload = json_dumps(message)
         result = self.client.publish(self.topic_d2c, payload, qos=1)
         return result.rc == mqtt.MQTT_ERR_SUCCESS
 
-    def send_gnss_location(self):
+    def send_gnss_location(self, ts=None):
         """Send current GPS position from the Tokyo route."""
-        point = self.route[self.route_index]
-        lat = point["lat"] + random.gauss(0, 0.0001)
-        lng = point["lng"] + random.gauss(0, 0.0001)
+        idx = self.route_index
+        lat = ROUTE_LATS[idx] + random.gauss(0, 0.0001)
+        lng = ROUTE_LNGS[idx] + random.gauss(0, 0.0001)
         accuracy = random.uniform(3.0, 15.0)
 
         msg = {
             "appId": "GNSS",
-            "ts": now_ms(),
+            "ts": ts or now_ms(),
             "data": {
                 "lat": round(lat, 6),
                 "lon": round(lng, 6),
@@ -501,82 +640,55 @@ class DeviceSimulator:
             },
         }
 
-        name = point.get("name", f"Point {self.route_index}")
         if self._publish_d2c(msg):
-            print(
-                f"[GNSS] Sent: {lat:.6f}N {lng:.6f}E "
-                f"(acc:{accuracy:.1f}m) near {name}"
-            )
+            logger.info("[GNSS] Sent: %.6fN %.6fE (acc:%.1fm) near %s",
+                        lat, lng, accuracy, ROUTE_NAMES[idx])
 
-        self.route_index = (self.route_index + 1) % len(self.route)
+        self.route_index = (idx + 1) % len(ROUTE_NAMES)
 
-    def send_temperature(self):
+    def send_temperature(self, ts=None):
         """Send simulated temperature reading."""
-        base = self.config["simulation"]["temperature_base"]
-        variation = self.config["simulation"]["temperature_variation"]
-        hour = datetime.now().hour
-        daily_offset = variation * math.sin((hour - 6) * math.pi / 12)
-        temp = base + daily_offset + random.gauss(0, 0.5)
+        daily_offset = self._daily_offsets[time.localtime().tm_hour]
+        temp = self._temp_base + daily_offset + random.gauss(0, 0.5)
 
         msg = {
             "appId": "TEMP",
             "messageType": "DATA",
-            "ts": now_ms(),
+            "ts": ts or now_ms(),
             "data": round(temp, 1),
         }
 
         if self._publish_d2c(msg):
-            print(f"[TEMP] Sent: {temp:.1f} C")
+            logger.info("[TEMP] Sent: %.1f C", temp)
 
-    def send_test_counter(self):
+    def send_test_counter(self, ts=None):
         msg = {
             "appId": "COUNT",
             "messageType": "DATA",
-            "ts": now_ms(),
+            "ts": ts or now_ms(),
             "data": self.test_counter,
         }
         if self._publish_d2c(msg):
-            print(f"[COUNT] Sent: {self.test_counter}")
+            logger.info("[COUNT] Sent: %d", self.test_counter)
             self.test_counter += 1
 
-    def send_alert(self, alert_type, value=0, description=None):
+    def send_alert(self, alert_type, value=0, description=None, ts=None):
         msg = {
             "appId": "ALERT",
             "messageType": "DATA",
-            "ts": now_ms(),
+            "ts": ts or now_ms(),
             "data": {"type": alert_type, "value": value},
         }
         if description:
             msg["data"]["description"] = description
         if self._publish_d2c(msg):
-            print(f"[ALERT] Sent: type={alert_type}, desc={description}")
+            logger.info("[ALERT] Sent: type=%s, desc=%s", alert_type, description)
 
     def send_device_info(self):
         """Send device info on startup via d2c topic."""
-        app_version = self.config["simulation"].get("app_version", "0.0.1")
-        msg = {
-            "appId": "DEVICE",
-            "messageType": "DATA",
-            "ts": now_ms(),
-            "data": {
-                "networkInfo": {
-                    "networkCode": "10",
-                    "areaCode": "1234",
-                    "mccmnc": "44010",
-                    "ipAddress": "10.0.0.1",
-                    "cellID": "ABCD1234",
-                    "rsrp": -85,
-                },
-                "simInfo": {
-                    "iccid": "8981100000000000000",
-                    "imsi": "440100000000000",
-                },
-                "appVersion": app_version,
-                "config": self.shadow_config,
-            },
-        }
-        self._publish_d2c(msg)
-        print(f"[Device] Sent device info (version: {app_version})")
+        self._device_info_msg["ts"] = now_ms()
+        self._publish_d2c(self._device_info_msg)
+        print(f"[Device] Sent device info (version: {self._app_version})")
 
     # ---- Connection Setup ----
 
@@ -601,6 +713,10 @@ class DeviceSimulator:
         # Reconnect backoff: 1s initial, 30s max
         self.client.reconnect_delay_set(min_delay=1, max_delay=30)
 
+        # Let GNSS/counter/temperature bursts pipeline instead of stalling
+        # behind paho's default of 20 unacknowledged QoS 1 messages
+        self.client.max_inflight_messages_set(100)
+
         # TLS with device certificates
         self.client.tls_set(
             ca_certs=self.certs.ca_path,
@@ -619,6 +735,7 @@ class DeviceSimulator:
         print(f"[MQTT] d2c: {self.topic_d2c}")
         print(f"[MQTT] c2d: {self.topic_c2d}")
 
+        self._connected_event.clear()
         try:
             self.client.connect(self.mqtt_host, 8883, keepalive=120)
         except Exception as e:
@@ -627,17 +744,12 @@ class DeviceSimulator:
 
         self.client.loop_start()
 
-        timeout = 30
-        while not self.connected and timeout > 0:
-            time.sleep(1)
-            timeout -= 1
-
-        if not self.connected:
+        # Returns as soon as _on_connect sees the CONNACK
+        if not self._connected_event.wait(timeout=30):
             print("[MQTT] Connection timed out!")
             return False
 
         if not self._diag_mode:
-            time.sleep(2)
             self.send_device_info()
         return True
 
@@ -679,11 +791,10 @@ class DeviceSimulator:
         # Send startup alert
         self.send_alert(1, 0, "Device simulator started")
 
-        # Start periodic threads
-        location_thread = threading.Thread(target=self._location_loop, daemon=True)
-        temperature_thread = threading.Thread(target=self._temperature_loop, daemon=True)
-        location_thread.start()
-        temperature_thread.start()
+        # Start periodic sender
+        self._stop_event.clear()
+        periodic_thread = threading.Thread(target=self._periodic_loop, daemon=True)
+        periodic_thread.start()
 
         # Keyboard input loop
         try:
@@ -705,7 +816,7 @@ class DeviceSimulator:
                         print(f"[Config] {json.dumps(self.shadow_config, indent=2)}")
                     elif cmd == "i":
                         idx = self.route_index
-                        total = len(self.route)
+                        total = len(ROUTE_NAMES)
                         print(f"[Route] Position {idx}/{total}")
                         print(f"[Route] Interval: {self.shadow_config['locationInterval']}s")
                 except EOFError:
@@ -714,36 +825,42 @@ class DeviceSimulator:
             print("\nShutting down...")
 
         self.running = False
+        self._stop_event.set()
+        periodic_thread.join()
         self.disconnect()
 
-    def _location_loop(self):
-        time.sleep(5)
-        while self.running:
-            if self.connected:
-                self.send_gnss_location()
-                if self.shadow_config.get("counterEnable", False):
-                    self.send_test_counter()
-
-            interval = self.shadow_config.get("locationInterval", 300)
-            for _ in range(interval):
-                if not self.running:
-                    return
-                time.sleep(1)
-
-    def _temperature_loop(self):
-        time.sleep(10)
-        while self.running:
-            if self.connected:
-                self.send_temperature()
-
-            interval = self.config["simulation"].get("temperature_interval_seconds", 300)
-            for _ in range(interval):
-                if not self.running:
-                    return
-                time.sleep(1)
+    def _periodic_loop(self):
+        """Send location and temperature on their own intervals.
+
+        A single thread sleeps on the stop event until the nearest
+        deadline, so shutdown wakes it immediately.
+        """
+        start = time.monotonic()
+        next_loc = start + 5
+        next_temp = start + 10
+        while True:
+            timeout = min(next_loc, next_temp) - time.monotonic()
+            if self._stop_event.wait(max(0.0, timeout)):
+                return
+            now = time.monotonic()
+            # Messages sent in the same tick share one timestamp
+            ts = now_ms()
+            if now >= next_loc:
+                if self.connected:
+                    self.send_gnss_location(ts)
+                    if self.shadow_config.get("counterEnable", False):
+                        self.send_test_counter(ts)
+                next_loc = now + self.shadow_config.get("locationInterval", 300)
+            if now >= next_temp:
+                if self.connected:
+                    self.send_temperature(ts)
+                next_temp = now + self._temp_interval
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("SIM_LOG", "INFO").upper(),
+                        format="%(message)s", stream=sys.stdout)
+
     print("=" * 60)
     print("  Kid GPS Tracker - nRF Cloud Device Simulator")
     print("  Creates a virtual device (no hardware needed)")
@@ -767,12 +884,12 @@ if __name__ == "__main__":
             print(f"[DIAG]   Firmware: {device.get('firmware', {})}")
             print(f"[DIAG]   Tags: {device.get('tags', [])}")
             print(f"[DIAG]   Full response: {json.dumps(device, indent=2)[:500]}")
-        except HTTPError as e:
-            if e.code == 404:
+        except requests.HTTPError as e:
+            if e.response.status_code == 404:
                 print(f"[DIAG] Device NOT found on nRF Cloud!")
                 print(f"[DIAG] The device may need to be re-provisioned.")
             else:
-                print(f"[DIAG] API error: HTTP {e.code}")
+                print(f"[DIAG] API error: HTTP {e.response.status_code}")
         except Exception as e:
             print(f"[DIAG] Error checking device: {e}")
 
@@ -5,7 +5,7 @@ Setup Helper for nRF Cloud Device Simulator
 This script helps you set up the device simulator by:
   1. Creating config.json from the template
   2. Verifying your API key works
-  3. Checking if OpenSSL is available (needed for certificate generation)
+  3. Checking that the simulator's Python packages are installed
 
 The simulator creates a virtual "soft device" on nRF Cloud.
 No physical hardware needed -- only an nRF Cloud API key.
@@ -15,58 +15,63 @@ Usage:
 """
 
 import os
-import sys
 import json
 import shutil
+import importlib.util
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def check_openssl():
-    """Check if OpenSSL is available."""
-    ret = os.system("openssl version >nul 2>nul" if sys.platform == "win32"
-                    else "openssl version >/dev/null 2>&1")
-    return ret == 0
+# Top-level modules the simulator imports (see requirements.txt)
+REQUIRED_MODULES = ("paho", "cryptography", "requests")
+
+
+def check_dependencies():
+    """Return the required modules that are not installed."""
+    return [name for name in REQUIRED_MODULES
+            if importlib.util.find_spec(name) is None]
 
 
 def verify_api_key(api_key, api_host):
     """Verify the API key by calling the account endpoint."""
-    from urllib import request as urllib_request
-    from urllib.error import HTTPError
+    try:
+        import requests
+    except ImportError:
+        return False, "requests not installed"
 
     url = f"{api_host}/v1/account"
-    req = urllib_request.Request(url, method="GET")
-    req.add_header("Authorization", f"Bearer {api_key}")
-    req.add_header("Content-Type", "application/json")
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
 
     try:
-        with urllib_request.urlopen(req) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            return True, data
-    except HTTPError as e:
-        return False, f"HTTP {e.code}"
+        resp = requests.get(url, headers=headers)
+        resp.raise_for_status()
+        return True, resp.json()
+    except requests.HTTPError as e:
+        return False, f"HTTP {e.response.status_code}"
     except Exception as e:
         return False, str(e)
 
 
 def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_template = os.path.join(script_dir, "config_template.json")
-    config_file = os.path.join(script_dir, "config.json")
-    certs_dir = os.path.join(script_dir, "certs")
+    config_template = os.path.join(SCRIPT_DIR, "config_template.json")
+    config_file = os.path.join(SCRIPT_DIR, "config.json")
 
     print("=" * 60)
     print("  nRF Cloud Device Simulator - Setup")
     print("=" * 60)
     print()
 
-    # Step 1: Check OpenSSL
-    print("[1/3] Checking OpenSSL...")
-    if check_openssl():
-        print("  [OK] OpenSSL is available")
+    # Step 1: Check Python packages
+    print("[1/3] Checking Python packages...")
+    missing = check_dependencies()
+    if not missing:
+        print("  [OK] Required packages are installed")
     else:
-        print("  [!] OpenSSL not found!")
-        print("      Install via: winget install ShiningLight.OpenSSL")
-        print("      Or download: https://slproweb.com/products/Win32OpenSSL.html")
-        print("      After installing, add to PATH and restart this script.")
+        print(f"  [!] Missing packages: {', '.join(missing)}")
+        print("      Install via: py -m pip install -r requirements.txt")
+        print("      Then restart this script.")
         print()
         resp = input("  Continue anyway? (y/N): ").strip().lower()
         if resp != "y":
@@ -123,11 +128,9 @@ def main():
     print(f"  Config: {config_file}")
     print()
 
-    os.makedirs(certs_dir, exist_ok=True)
-
     print("  On first run, the simulator will:")
-    print("    1. Download Amazon Root CA certificate")
-    print("    2. Generate a device key pair (via OpenSSL)")
+    print("    1. Install the bundled Amazon Root CA certificate")
+    print("    2. Generate a device key pair and self-signed certificate")
     print("    3. Register the virtual device on nRF Cloud")
     print("    4. Connect via MQTT and start sending data")
     print()